@@ -1,13 +1,44 @@
 import os
-import json
 import asyncio
+import functools
+import hashlib
+import importlib.util
 import logging
 import re
-from fastapi import FastAPI, UploadFile, File
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+import psutil
+
+# ------------------- CPU Threads -------------------
+# One intra-op thread per physical core (hyperthreads only add contention for GEMMs).
+# Must be set before numpy/torch/CTranslate2 load their OpenMP/MKL runtimes.
+PHYSICAL_CORES = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+os.environ.setdefault("OMP_NUM_THREADS", str(PHYSICAL_CORES))
+os.environ.setdefault("MKL_NUM_THREADS", str(PHYSICAL_CORES))
+
+def _parse_thread_count(value: str) -> int:
+    """Threads for the outermost level of an OMP_NUM_THREADS value like "8" or "8,1"."""
+    try:
+        threads = int(value.split(",")[0])
+    except ValueError:
+        return PHYSICAL_CORES
+    return threads if threads > 0 else PHYSICAL_CORES
+
+CPU_THREADS = _parse_thread_count(os.environ["OMP_NUM_THREADS"])
+
+import numpy as np
+import orjson
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import StreamingResponse
+from faster_whisper import WhisperModel, decode_audio
 from starlette.concurrency import run_in_threadpool
-from transformers import pipeline
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, BitsAndBytesConfig, pipeline
+import torch
 import uvicorn
 
 # ------------------- Logging -------------------
@@ -17,6 +48,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+torch.set_num_threads(CPU_THREADS)
+torch.set_num_interop_threads(1)
+logger.info(f"Using {CPU_THREADS} CPU threads ({PHYSICAL_CORES} physical cores)")
+
 # ------------------- FastAPI -------------------
 app = FastAPI()
 
@@ -27,177 +62,567 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compresses regular responses; Starlette skips text/event-stream, see sse_response()
+app.add_middleware(GZipMiddleware, minimum_size=512)
 
 # ------------------- Model Pipelines -------------------
 logger.info("Loading models... this may take a while the first time.")
+# faster-whisper (CTranslate2) model size or converted model repo
+ASR_MODEL = os.getenv("ASR_MODEL", "small")
 # Using a slightly larger model for better summarization results
-ASR_MODEL = os.getenv("ASR_MODEL", "openai/whisper-small") 
 SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "facebook/bart-large-cnn")
+# Set USE_GPU=1 to run both models on the first CUDA device in half precision
+USE_GPU = os.getenv("USE_GPU", "0") == "1"
+
+if USE_GPU and torch.cuda.is_available():
+    DEVICE = 0
+    # BF16 on Ampere+ (same range as FP32, no overflow risk), FP16 otherwise
+    TORCH_DTYPE = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+else:
+    if USE_GPU:
+        logger.warning("USE_GPU=1 but CUDA is not available, falling back to CPU.")
+    DEVICE = -1 # device=-1 for CPU
+    TORCH_DTYPE = torch.float32
+logger.info(f"Running models on {'cuda:0' if DEVICE >= 0 else 'cpu'} with {TORCH_DTYPE}")
+SAMPLE_RATE = 16000 # Whisper's native input rate
+# CTranslate2 runs Whisper with INT8 GEMMs on CPU, half precision on GPU
+ASR_COMPUTE_TYPE = os.getenv(
+    "ASR_COMPUTE_TYPE",
+    ("bfloat16" if TORCH_DTYPE == torch.bfloat16 else "float16") if DEVICE >= 0 else "int8",
+)
+
+# Set SUMMARIZER_INT8=1 to load the summarizer with 8-bit weights:
+# bitsandbytes on GPU, an OpenVINO INT8 export (optimum-intel) on CPU.
+# Neither is installed by default, see the optional entries in requirements.txt.
+SUMMARIZER_INT8 = os.getenv("SUMMARIZER_INT8", "0") == "1"
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+# Number of prompts per summarizer forward pass
+SUMMARIZER_BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "8"))
+# Transcript words kept in the decisions/action-items prompts (fits BART's 1024-token context)
+PROMPT_MAX_WORDS = 700
+# Greedy decoding by default: BART-large-cnn ships with 4 beams, a ~4x compute multiplier.
+# Raise SUMMARIZER_NUM_BEAMS (e.g. 2) if summary quality regresses.
+SUMMARIZER_NUM_BEAMS = int(os.getenv("SUMMARIZER_NUM_BEAMS", "1"))
+GENERATION_KWARGS = {
+    "num_beams": SUMMARIZER_NUM_BEAMS,
+    "early_stopping": SUMMARIZER_NUM_BEAMS > 1, # Only meaningful for beam search
+    "no_repeat_ngram_size": 3,
+    "do_sample": False,
+}
+# Set SUMMARIZER_COMPILE=1 to torch.compile the summarizer's forward pass (PyTorch backends only;
+# first requests are slower while shapes get compiled; experimental on the pinned torch 2.2)
+SUMMARIZER_COMPILE = os.getenv("SUMMARIZER_COMPILE", "0") == "1"
+
+
+def load_summarizer():
+    """Build the summarization pipeline, quantized to INT8 if requested."""
+    if not SUMMARIZER_INT8:
+        summarizer = pipeline(
+            "summarization",
+            model=SUMMARIZER_MODEL,
+            device=DEVICE,
+            torch_dtype=TORCH_DTYPE,
+        )
+        if SUMMARIZER_COMPILE:
+            # Compile forward() so generate() keeps working; shapes vary per call, so dynamic + no CUDA graphs
+            summarizer.model.forward = torch.compile(
+                summarizer.model.forward,
+                mode="default",
+                dynamic=True,
+                fullgraph=False,
+            )
+            logger.info("Summarizer forward pass wrapped with torch.compile.")
+        return summarizer
+
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+    if DEVICE >= 0:
+        # Optional dependency, only needed for GPU INT8 inference
+        if importlib.util.find_spec("bitsandbytes") is None:
+            raise ImportError("SUMMARIZER_INT8=1 on GPU requires bitsandbytes (see requirements.txt)")
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            SUMMARIZER_MODEL,
+            quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+            device_map="auto",
+            torch_dtype=TORCH_DTYPE,
+        )
+        logger.info("Summarizer loaded with bitsandbytes INT8 weights.")
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+    # Optional dependency, only needed for CPU INT8 inference
+    try:
+        from optimum.intel import OVModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("SUMMARIZER_INT8=1 on CPU requires optimum[openvino] (see requirements.txt)") from e
+
+    # Export + weight quantization is slow, so keep the result on disk and reuse it
+    export_dir = os.path.join(MODEL_CACHE_DIR, SUMMARIZER_MODEL.replace("/", "--") + "-ov-int8")
+    if os.path.isdir(export_dir):
+        model = OVModelForSeq2SeqLM.from_pretrained(export_dir)
+    else:
+        model = OVModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL, export=True, load_in_8bit=True)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+        logger.info(f"Saved INT8 summarizer export to {export_dir}")
+    logger.info("Summarizer loaded with OpenVINO INT8 weights.")
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
 
 try:
     # Load models once at startup
-    asr_pipeline = pipeline("automatic-speech-recognition", model=ASR_MODEL, device=-1) # device=-1 for CPU
-    summarizer_pipeline = pipeline("summarization", model=SUMMARIZER_MODEL, device=-1) # device=-1 for CPU
+    asr_model = WhisperModel(
+        ASR_MODEL,
+        device="cuda" if DEVICE >= 0 else "cpu",
+        compute_type=ASR_COMPUTE_TYPE,
+        cpu_threads=CPU_THREADS,
+    )
+    summarizer_pipeline = load_summarizer()
     logger.info("Models loaded successfully.")
 except Exception as e:
     logger.error(f"Failed to load models: {e}")
     # Initialize pipelines as None if loading failed
-    asr_pipeline = None
+    asr_model = None
     summarizer_pipeline = None
 
 
+def warmup_models():
+    """Run one tiny ASR + summarization pass so the first request sees steady-state latency."""
+    if DEVICE >= 0:
+        # Let cuDNN autotune kernels once, during warmup rather than on a user request
+        torch.backends.cudnn.benchmark = True
+    try:
+        # 1 s of silence; VAD off so the encoder/decoder actually run. Segments are lazy, so consume them.
+        segments, _ = asr_model.transcribe(np.zeros(SAMPLE_RATE, np.float32), beam_size=1, vad_filter=False)
+        list(segments)
+        summarizer_pipeline("warmup " * 32, max_length=16, min_length=4, **GENERATION_KWARGS)
+        logger.info("Models warmed up.")
+    except Exception as e:
+        logger.warning(f"Model warmup failed, first request may be slower: {e}")
+
+
+if asr_model and summarizer_pipeline:
+    warmup_models()
+
+
 UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR_PATH = Path(UPLOAD_DIR)
+UPLOAD_DIR_PATH.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1 << 20 # 1 MB
 
 # ------------------- SSE Helper -------------------
-def sse_format(payload: dict) -> str:
+def sse_format(payload: dict) -> bytes:
     """Serialize payload as JSON for SSE."""
-    return f"data: {json.dumps(payload)}\n\n"
+    # orjson returns bytes, which StreamingResponse sends without re-encoding
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+SSE_DONE = b"data: [DONE]\n\n"
+
+async def gzip_sse(events):
+    """Gzip an SSE byte stream, sync-flushing after every event so nothing sits in the compressor."""
+    compressor = zlib.compressobj(wbits=31) # 31 = gzip container
+    try:
+        async for event in events:
+            yield compressor.compress(event) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        # Run the inner generator's cleanup right away if the client disconnects
+        await events.aclose()
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (honours q-values and "*")."""
+    qualities = {}
+    for token in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in token.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+def sse_response(events, request: Request) -> StreamingResponse:
+    """Wrap an SSE generator in a StreamingResponse, gzipped if the client accepts it."""
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        events = gzip_sse(events)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+# ------------------- Result Cache -------------------
+# Finished results are stored as <sha256 of upload>-<settings key>.json so a re-upload
+# or re-stream of the same meeting skips ASR and summarization entirely. Cache files and
+# upload hash sidecars live outside UPLOAD_DIR so clients can't plant or overwrite them.
+RESULT_CACHE_DIR = Path(os.getenv("RESULT_CACHE_DIR", os.path.join(MODEL_CACHE_DIR, "results")))
+UPLOAD_HASH_DIR = RESULT_CACHE_DIR / "upload_hashes"
+UPLOAD_HASH_DIR.mkdir(parents=True, exist_ok=True)
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+# Anything that changes the output must change the key, or stale results get served
+RESULT_SETTINGS_KEY = hashlib.sha256(orjson.dumps({
+    "asr_model": ASR_MODEL,
+    "asr_compute_type": ASR_COMPUTE_TYPE,
+    "summarizer_model": SUMMARIZER_MODEL,
+    "summarizer_int8": SUMMARIZER_INT8,
+    "summarizer_dtype": str(TORCH_DTYPE),
+    "prompt_max_words": PROMPT_MAX_WORDS,
+    "generation": GENERATION_KWARGS,
+})).hexdigest()[:16]
+
+def hash_path_for(filename: str) -> Path:
+    """Path of the sidecar file holding an upload's SHA256 (named by a digest, so any valid filename fits)."""
+    return UPLOAD_HASH_DIR / f"{hashlib.sha256(filename.encode('utf-8')).hexdigest()}.sha256"
+
+def _file_identity(st: os.stat_result) -> list:
+    """Inode/size/mtime of a file; survives os.replace, changes when the file is replaced."""
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+def read_upload_hash(file_path: Path):
+    """Return the upload's SHA256 from its sidecar, or None if missing, invalid or stale."""
+    try:
+        sidecar = orjson.loads(hash_path_for(file_path.name).read_bytes())
+        identity = _file_identity(file_path.stat())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get("file") != identity:
+        return None
+    file_hash = sidecar.get("sha256")
+    return file_hash if isinstance(file_hash, str) and _SHA256_RE.fullmatch(file_hash) else None
+
+# mkstemp creates files as 0600; give final files the usual umask-based mode instead.
+# Read once at import, os.umask() can't be queried without setting it (not thread-safe).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+def _write_atomic(path: Path, data: bytes):
+    """Write data to path via a uniquely named temp file + os.replace."""
+    tmp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=".tmp", delete=False)
+    tmp_path = Path(tmp.name)
+    try:
+        with tmp as f:
+            f.write(data)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+def result_cache_path(file_hash: str) -> Path:
+    """Path of the cached result JSON for a content hash under the current settings."""
+    if not _SHA256_RE.fullmatch(file_hash):
+        raise ValueError(f"Invalid content hash: {file_hash!r}")
+    return RESULT_CACHE_DIR / f"{file_hash}-{RESULT_SETTINGS_KEY}.json"
+
+def _is_valid_result(result) -> bool:
+    """Check a cached result has the fields the stream replays, with the right types."""
+    return (
+        isinstance(result, dict)
+        and isinstance(result.get("transcript"), str)
+        and isinstance(result.get("summary"), list)
+        and all(isinstance(part, str) for part in result["summary"])
+        and isinstance(result.get("decision"), str)
+        and isinstance(result.get("action_item"), str)
+    )
+
+def load_cached_result(file_hash: str):
+    """Return the cached result dict for a hash, or None if missing/unreadable/malformed."""
+    try:
+        result = orjson.loads(result_cache_path(file_hash).read_bytes())
+    except (OSError, ValueError):
+        return None
+    return result if _is_valid_result(result) else None
+
+def save_cached_result(file_hash: str, result: dict):
+    """Write the result JSON atomically (tmp file + os.replace)."""
+    _write_atomic(result_cache_path(file_hash), orjson.dumps(result))
+
+# ------------------- Transcription Helper -------------------
+async def stream_transcript(audio: np.ndarray):
+    """Yield transcript segments as faster-whisper decodes them."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        # Segments are produced lazily, decoding happens while iterating (blocking)
+        try:
+            segments, info = asr_model.transcribe(audio, beam_size=1, vad_filter=True)
+            logger.info(f"Detected language '{info.language}' ({info.duration:.1f}s of audio)")
+            for segment in segments:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, segment.text.strip())
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = asyncio.ensure_future(run_in_threadpool(produce))
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    finally:
+        # Client went away mid-stream: let the worker thread finish early
+        stop.set()
+
+# ------------------- Sentence Chunking -------------------
+# Use Python's built-in 're' module for sentence splitting.
+# This is robust and avoids errors from specific tokenizer versions.
+_SENT_RE = re.compile(r'(?<=[.?!])\s+')
+
+def chunk_sentences(text: str, max_words: int = 400) -> list[str]:
+    """Group sentences into chunks of ~max_words words in a single pass."""
+    chunks = []
+    current_chunk = []
+    current_len = 0
+    for sentence in _SENT_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        wc = sentence.count(" ") + 1 # cheaper than len(sentence.split())
+        if current_chunk and current_len + wc > max_words:
+            chunks.append(" ".join(current_chunk))
+            current_chunk, current_len = [], 0
+        current_chunk.append(sentence)
+        current_len += wc
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+# ------------------- Summarization Helper -------------------
+# Every summarizer call goes through this single worker: concurrent generate() calls
+# would each spin up CPU_THREADS OpenMP threads (oversubscribing the cores) and replay
+# compiled/CUDA-graph forwards from several threads at once. Jobs run in submission order.
+_summarizer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+
+async def run_on_summarizer(func, *args, **kwargs):
+    """Run a blocking summarizer call on the dedicated summarizer thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_summarizer_executor, functools.partial(func, *args, **kwargs))
+
+async def summarize(texts: list[str], max_length: int, min_length: int) -> list[str]:
+    """Summarize a batch of texts in one summarizer call and return the summary texts."""
+    if not texts:
+        return []
+    results = await run_on_summarizer(
+        summarizer_pipeline,
+        texts,
+        batch_size=SUMMARIZER_BATCH_SIZE,
+        truncation=True,
+        max_length=max_length,
+        min_length=min_length,
+        **GENERATION_KWARGS
+    )
+    return [result["summary_text"].strip() for result in results]
+
+async def summarize_chunks(chunks: list[str], queue: asyncio.Queue):
+    """Summarize chunks (the first alone, then full batches) onto the queue; None marks the end."""
+    try:
+        start = 0
+        while start < len(chunks):
+            size = 1 if start == 0 else SUMMARIZER_BATCH_SIZE
+            for summary_text in await summarize(chunks[start:start + size], max_length=120, min_length=30):
+                await queue.put(summary_text)
+            start += size
+    except Exception as e:
+        # Hand the error to the consumer instead of losing it in the task
+        await queue.put(e)
+    await queue.put(None)
+
+# ------------------- Structured Extraction Helper -------------------
+DECISION_INSTRUCTION = "From the following transcript, identify and list any key decisions made. If no clear decisions are found, state 'No key decisions were explicitly mentioned.':"
+ACTION_INSTRUCTION = "From the following transcript, list all action items or next steps assigned to individuals. If none are found, state 'No specific action items were assigned.':"
+
+def extract_from_transcript(transcript_text: str, instructions: list[str], max_length: int, min_length: int) -> list[str]:
+    """Batch one "<instruction> <transcript>" prompt per instruction, tokenizing the transcript once (blocking)."""
+    tokenizer = summarizer_pipeline.tokenizer
+    model = summarizer_pipeline.model
+
+    instruction_ids = [tokenizer(instruction, add_special_tokens=False)["input_ids"] for instruction in instructions]
+    # Leave room for the longest instruction plus the model's own special tokens
+    max_len = min(tokenizer.model_max_length, getattr(model.config, "max_position_embeddings", tokenizer.model_max_length))
+    budget = max_len - max(len(ids) for ids in instruction_ids) - tokenizer.num_special_tokens_to_add()
+    transcript_ids = tokenizer(
+        " " + transcript_text, add_special_tokens=False, truncation=True, max_length=budget
+    )["input_ids"]
+
+    prompts = [tokenizer.build_inputs_with_special_tokens(ids + transcript_ids) for ids in instruction_ids]
+    inputs = tokenizer.pad({"input_ids": prompts}, return_tensors="pt").to(model.device)
+    with torch.inference_mode():
+        output_ids = model.generate(
+            **inputs,
+            max_length=max_length,
+            min_length=min_length,
+            **GENERATION_KWARGS,
+        )
+    return [text.strip() for text in tokenizer.batch_decode(output_ids, skip_special_tokens=True)]
 
 # ------------------- Audio Extraction -------------------
-async def extract_audio(input_path: str, output_path: str):
-    """Use async subprocess for ffmpeg extraction."""
+async def extract_audio(input_path: Path) -> np.ndarray:
+    """Decode the input to 16 kHz mono float32 samples in-process with PyAV (no ffmpeg fork)."""
     logger.info(f"Extracting audio from {input_path}")
-    process = await asyncio.create_subprocess_exec(
-        "ffmpeg", "-y", "-i", input_path, "-vn", "-acodec", "mp3", output_path,
-        stdout=asyncio.subprocess.DEVNULL,
-        stderr=asyncio.subprocess.DEVNULL
-    )
-    await process.communicate()
-    logger.info(f"Audio extracted to {output_path}")
+    # faster-whisper's decoder wraps PyAV (libav) + its resampler; blocking, so run in threadpool
+    audio = await run_in_threadpool(decode_audio, str(input_path), sampling_rate=SAMPLE_RATE)
+    logger.info(f"Extracted {len(audio) / SAMPLE_RATE:.1f}s of audio")
+    return audio
+
+# ------------------- Filename Sanitization -------------------
+def safe_filename(filename: str) -> str:
+    """Strip any directory part from a client-supplied name and reject hidden/empty names."""
+    # Treat backslashes as separators too so Windows-style paths are reduced to their basename
+    name = PurePosixPath((filename or "").replace("\\", "/")).name
+    if not name or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid file name.")
+    return name
+
+# ------------------- Upload Storage -------------------
+def _save_and_hash(src, dest_path: Path) -> str:
+    """Copy an upload to dest_path in 1 MB chunks via a temp file, hashing as we go (blocking)."""
+    hasher = hashlib.sha256()
+    # Fixed short temp name, so long-but-valid upload names do not exceed NAME_MAX
+    tmp = tempfile.NamedTemporaryFile(dir=dest_path.parent, prefix=".up", suffix=".part", delete=False)
+    tmp_path = Path(tmp.name)
+    try:
+        with tmp as f:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+                f.write(chunk)
+        file_hash = hasher.hexdigest()
+        sidecar = {"sha256": file_hash, "file": _file_identity(tmp_path.stat())}
+        _write_atomic(hash_path_for(dest_path.name), orjson.dumps(sidecar))
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, dest_path)
+    finally:
+        # Only still there if the copy or the sidecar write failed
+        tmp_path.unlink(missing_ok=True)
+    return file_hash
 
 # ------------------- Endpoints -------------------
 @app.post("/upload-meeting/")
 async def upload_meeting(file: UploadFile = File(...)):
     """Save uploaded file and return filename."""
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    filename = safe_filename(file.filename)
+    file_path = UPLOAD_DIR_PATH / filename
     # Ensure the file is not empty before reading
     if not file.file:
         raise HTTPException(status_code=400, detail="Empty file uploaded.")
         
-    file_content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    logger.info(f"File uploaded: {file.filename}")
-    return {"filename": file.filename}
+    # Hashing + disk writes are blocking, keep them off the event loop
+    await run_in_threadpool(_save_and_hash, file.file, file_path)
+    logger.info(f"File uploaded: {filename}")
+    return {"filename": filename}
 
 @app.get("/transcribe-stream/{filename}")
-async def transcribe_stream(filename: str):
+async def transcribe_stream(filename: str, request: Request):
     """Stream transcription + summarization over SSE."""
-    if not asr_pipeline or not summarizer_pipeline:
+    filename = safe_filename(filename)
+    if not asr_model or not summarizer_pipeline:
         async def error_stream():
             yield sse_format({"tag": "ERROR", "message": "AI models failed to load at startup. Check console logs."})
-            yield "data: [DONE]\n\n"
-        return StreamingResponse(error_stream(), media_type="text/event-stream")
+            yield SSE_DONE
+        return sse_response(error_stream(), request)
 
     async def event_generator():
-        input_path = os.path.join(UPLOAD_DIR, filename)
-        if not os.path.exists(input_path):
+        input_path = UPLOAD_DIR_PATH / filename
+        if not input_path.exists():
             yield sse_format({"tag": "ERROR", "message": "File not found on server."})
-            yield "data: [DONE]\n\n"
+            yield SSE_DONE
             return
 
-        base_name = os.path.splitext(filename)[0]
-        audio_path = os.path.join(UPLOAD_DIR, f"{base_name}_temp_audio.mp3")
-
+        extraction_task = summary_task = None
         try:
+            # Cache lookup is blocking disk I/O, keep it off the event loop
+            file_hash = await run_in_threadpool(read_upload_hash, input_path)
+            cached = await run_in_threadpool(load_cached_result, file_hash) if file_hash else None
+            if cached:
+                logger.info(f"Serving cached result for {filename}")
+                yield sse_format({"tag": "STATUS", "message": "Found a previous analysis of this meeting."})
+                yield sse_format({"transcript": cached["transcript"]})
+                await asyncio.sleep(0)
+                for summary_text in cached["summary"]:
+                    yield sse_format({"summary": summary_text})
+                    await asyncio.sleep(0)
+                yield sse_format({"decision": cached["decision"]})
+                await asyncio.sleep(0)
+                yield sse_format({"action_item": cached["action_item"]})
+                yield sse_format({"tag": "STATUS", "message": "Structured analysis complete. Report ready."})
+                yield SSE_DONE
+                return
+
             yield sse_format({"tag": "STATUS", "message": "Connection established. Starting audio extraction..."})
             await asyncio.sleep(0.01)
 
-            # Step 1: Extract audio (non-blocking external command)
-            await extract_audio(input_path, audio_path)
+            # Step 1: Extract audio straight into memory (in-process decode in threadpool)
+            audio = await extract_audio(input_path)
 
             # Step 2: Run ASR (blocking model run in threadpool)
             yield sse_format({"tag": "STATUS", "message": "Running speech recognition... (This may take a moment)"})
             
-            asr_result = await run_in_threadpool(
-                asr_pipeline, 
-                audio_path,
-                chunk_length_s=30, 
-                ignore_warning=True 
-            )
-            
-            transcript_text = asr_result["text"].strip()
-            logger.info(f"Transcript length: {len(transcript_text)} characters")
+            # Stream each segment as soon as it is decoded, keep the full text for summarization
+            transcript_parts = []
+            async for segment_text in stream_transcript(audio):
+                if segment_text:
+                    transcript_parts.append(segment_text)
+                    yield sse_format({"transcript": segment_text})
 
-            # Stream transcript in ~12 chunks
-            words = transcript_text.split()
-            chunk_size = max(1, len(words) // 12)
-            
-            # Use transcript_chunk to store parts being streamed
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield sse_format({"transcript": chunk})
+            transcript_text = " ".join(transcript_parts)
+            logger.info(f"Transcript length: {len(transcript_text)} characters")
 
             yield sse_format({"tag": "STATUS", "message": "Transcription complete. Starting structured analysis..."})
             
             # Step 3: Summarization and Structured Extraction
             
-            # FIX: Use Python's built-in 're' module for sentence splitting.
-            # This is robust and avoids errors from specific tokenizer versions.
-            sentences = re.split(r'(?<=[.?!])\s+', transcript_text)
-            sentences = [s.strip() for s in sentences if s.strip()]
-            
-            current_chunk = []
-            current_len = 0
-            sentence_chunks = []
-            # Group sentences into chunks of ~400 words for summarization
-            for sentence in sentences:
-                if current_len + len(sentence.split()) > 400:
-                    sentence_chunks.append(" ".join(current_chunk))
-                    current_chunk, current_len = [], 0
-                current_chunk.append(sentence)
-                current_len += len(sentence.split())
-
-            if current_chunk:
-                sentence_chunks.append(" ".join(current_chunk))
+            sentence_chunks = chunk_sentences(transcript_text)
 
             logger.info(f"Generated {len(sentence_chunks)} chunks for summarization")
             yield sse_format({"tag": "STATUS", "message": f"Summarizing {len(sentence_chunks)} text blocks..."})
 
-            # --- 3a. General Summary Generation (Chunked) ---
-            full_summary_parts = []
-            for idx, chunk in enumerate(sentence_chunks, 1):
-                summary_result = await run_in_threadpool(
-                    summarizer_pipeline,
-                    chunk,
-                    max_length=120,
-                    min_length=30,
-                    do_sample=False
-                )
-                summary_text = summary_result[0]["summary_text"]
-                full_summary_parts.append(summary_text)
-                # Stream each summary chunk
-                yield sse_format({"summary": summary_text})
-            
-            # --- 3b. Key Decisions Extraction ---
-            yield sse_format({"tag": "STATUS", "message": "Extracting Key Decisions..."})
-            decision_prompt = f"From the following transcript, identify and list any key decisions made. If no clear decisions are found, state 'No key decisions were explicitly mentioned.': {transcript_text}"
-            
-            decision_result = await run_in_threadpool(
-                summarizer_pipeline,
-                decision_prompt,
-                max_length=150,
-                min_length=10,
-                do_sample=False
-            )
-            decision_text = decision_result[0]["summary_text"].strip()
-            yield sse_format({"decision": decision_text})
+            # --- 3a. General Summary Generation (Chunked, batched) ---
+            # Summaries are produced in the background and streamed as each call finishes
+            summary_queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+            summary_task = asyncio.create_task(summarize_chunks(sentence_chunks, summary_queue))
 
-            # --- 3c. Action Items Extraction ---
-            yield sse_format({"tag": "STATUS", "message": "Extracting Action Items..."})
-            action_prompt = f"From the following transcript, list all action items or next steps assigned to individuals. If none are found, state 'No specific action items were assigned.': {transcript_text}"
-            
-            action_result = await run_in_threadpool(
-                summarizer_pipeline,
-                action_prompt,
+            # --- 3b/3c. Key Decisions + Action Items Extraction (one batch of 2) ---
+            # BART only sees ~1024 tokens, so don't tokenize/copy the rest of a long meeting
+            transcript_head = " ".join(transcript_text.split(maxsplit=PROMPT_MAX_WORDS)[:PROMPT_MAX_WORDS])
+
+            # Queued on the summarizer thread right behind the first summary batch
+            extraction_task = asyncio.create_task(run_on_summarizer(
+                extract_from_transcript,
+                transcript_head,
+                [DECISION_INSTRUCTION, ACTION_INSTRUCTION],
                 max_length=150,
                 min_length=10,
-                do_sample=False
-            )
-            action_text = action_result[0]["summary_text"].strip()
+            ))
+            yield sse_format({"tag": "STATUS", "message": "Extracting Key Decisions and Action Items..."})
+
+            full_summary_parts = []
+            while (item := await summary_queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                full_summary_parts.append(item)
+                # Stream each summary chunk
+                yield sse_format({"summary": item})
+
+            decision_text, action_text = await extraction_task
+            yield sse_format({"decision": decision_text})
             yield sse_format({"action_item": action_text})
 
+            if file_hash:
+                await run_in_threadpool(save_cached_result, file_hash, {
+                    "transcript": transcript_text,
+                    "summary": full_summary_parts,
+                    "decision": decision_text,
+                    "action_item": action_text,
+                })
+
             yield sse_format({"tag": "STATUS", "message": "Structured analysis complete. Report ready."})
 
         except Exception as e:
@@ -205,14 +630,17 @@ async def transcribe_stream(filename: str):
             yield sse_format({"tag": "ERROR", "message": f"Processing failed: {str(e)}"})
 
         finally:
-            # Final completion signal
-            yield "data: [DONE]\n\n"
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info(f"Cleaned up {audio_path}")
+            # No yields in here: this also runs when the client disconnects (GeneratorExit)
+            # Don't leave background summarization running if we bailed out early
+            for task in (extraction_task, summary_task):
+                if task and not task.done():
+                    task.cancel()
             # Note: The original uploaded file is kept in the uploads folder.
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+        # Final completion signal (success and error paths; the cached path sends its own)
+        yield SSE_DONE
+
+    return sse_response(event_generator(), request)
 
 # The entry point when running with start_app.sh or uvicorn directly
 if __name__ == "__main__":